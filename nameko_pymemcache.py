@@ -1,9 +1,333 @@
-from weakref import WeakKeyDictionary
+from __future__ import annotations
 
+import collections
+import copy
+import pickle
+import socket
+import sys
+import time
+import zlib
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Optional, Tuple, Union
+
+from eventlet import GreenPool
 from nameko.extensions import DependencyProvider
 
+from pymemcache.client.base import Client
 from pymemcache.client.hash import HashClient
-from pymemcache.serde import CompressedSerde
+from pymemcache.serde import (
+    DEFAULT_PICKLE_VERSION,
+    FLAG_BYTES,
+    FLAG_COMPRESSED,
+    FLAG_INTEGER,
+    FLAG_PICKLE,
+    FLAG_TEXT,
+    pickle_serde,
+    python_memcache_deserializer,
+)
+
+from xxhash import xxh3_64_intdigest
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None  # type: ignore[assignment]
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+try:
+    import pylibmc
+except ImportError:
+    pylibmc = None  # type: ignore[assignment]
+
+
+# Flags for msgpack-encoded and lz4/zstd-compressed values, next to
+# pymemcache's FLAG_* bits. zlib keeps FLAG_COMPRESSED for bmemcached.
+FLAG_MSGPACK = 1 << 5
+FLAG_LZ4 = 1 << 6
+FLAG_ZSTD = 1 << 7
+
+Key = Union[str, bytes]
+Server = Tuple[str, int]
+Encoded = Tuple[bytes, int]
+
+
+def _hash64(key: Key) -> int:
+    """Hash a memcached key to an unsigned 64-bit integer."""
+    if isinstance(key, str):
+        key = key.encode('utf8')
+    return xxh3_64_intdigest(key)
+
+
+def _mix64(value: int) -> int:
+    """Scramble a 64-bit integer with the splitmix64 finalizer."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+
+def jump_consistent_hash(key_hash: int, num_buckets: int) -> int:
+    """Map a 64-bit key hash to a bucket in ``range(num_buckets)``.
+
+    Jump Consistent Hash by Lamping & Veach: no lookup table, and only
+    ~1/n of the keys move when a bucket is appended.
+    """
+    bucket, jump = -1, 0
+    while jump < num_buckets:
+        bucket = jump
+        key_hash = (key_hash * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key_hash >> 33) + 1)))
+    return bucket
+
+
+class RendezvousHasher:
+    """Rendezvous (highest random weight) hasher for pymemcache's ``HashClient``.
+
+    Every node is scored against the key and the highest score wins, which
+    balances keys well even across two or three nodes and only moves the
+    keys of a node that is removed. Node seeds are hashed once when a node
+    is added, so a lookup hashes the key once and scores each node with
+    integer arithmetic only.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: list[str] = []
+        self._node_seeds: list[tuple[int, str]] = []
+
+    def add_node(self, node: str) -> None:
+        if node not in self.nodes:
+            self.nodes.append(node)
+            self._node_seeds.append((_hash64(node), node))
+
+    def remove_node(self, node: str) -> None:
+        if node not in self.nodes:
+            raise ValueError("No such node %s to remove" % (node))
+        index = self.nodes.index(node)
+        del self.nodes[index]
+        del self._node_seeds[index]
+
+    def get_node(self, key: Key) -> Optional[str]:
+        if not self._node_seeds:
+            return None
+        key_hash = _hash64(key)
+        _, node = max(
+            self._node_seeds,
+            key=lambda seed_node: (_mix64(seed_node[0] ^ key_hash), seed_node[1]),
+        )
+        return node
+
+
+class JumpHasher:
+    """Jump consistent hasher for pymemcache's ``HashClient``.
+
+    Nodes keep the index they were first added with, so the server order
+    in ``MEMCACHED_URIS`` must be identical across all clients. Jump needs
+    sequential buckets, so keys that land on a node which ``HashClient``
+    has marked dead are re-routed over the live nodes with rendezvous
+    hashing until the node is added back.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: list[str] = []
+        self._dead: set[str] = set()
+        self._fallback = RendezvousHasher()
+
+    def add_node(self, node: str) -> None:
+        if node not in self.nodes:
+            self.nodes.append(node)
+        self._dead.discard(node)
+        self._fallback.add_node(node)
+
+    def remove_node(self, node: str) -> None:
+        if node not in self.nodes or node in self._dead:
+            raise ValueError("No such node %s to remove" % (node))
+        self._dead.add(node)
+        self._fallback.remove_node(node)
+
+    def get_node(self, key: Key) -> Optional[str]:
+        if not self.nodes:
+            return None
+        node = self.nodes[jump_consistent_hash(_hash64(key), len(self.nodes))]
+        if node in self._dead:
+            return self._fallback.get_node(key)
+        return node
+
+
+class MsgpackSerde:
+    """Serde that encodes structured values with msgpack instead of pickle.
+
+    ``bytes``, ``str`` and ``int`` keep pymemcache's flags and encoding, so
+    counters still work with ``incr``/``decr``; everything else is packed
+    with msgpack. Values written by the pickle serde remain readable. Note
+    that msgpack has no tuple type, so tuples come back as lists.
+    """
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ImportError(
+                "The msgpack serializer requires the 'msgpack' package")
+
+    def serialize(self, key: Key, value: Any) -> Encoded:
+        value_type = type(value)
+        if value_type is bytes:
+            return value, FLAG_BYTES
+        if value_type is str:
+            return value.encode('utf8'), FLAG_TEXT
+        if value_type is int:
+            return b'%d' % value, FLAG_INTEGER
+        return _msgpack_encode(value)
+
+    def deserialize(self, key: Key, value: bytes, flags: int) -> Any:
+        if flags & FLAG_MSGPACK:
+            return msgpack.unpackb(value, raw=False, strict_map_key=False)
+        return python_memcache_deserializer(key, value, flags)
+
+
+def _pickle_encode(value: Any) -> Encoded:
+    return pickle.dumps(value, DEFAULT_PICKLE_VERSION), FLAG_PICKLE
+
+
+def _msgpack_encode(value: Any) -> Encoded:
+    return msgpack.packb(value, use_bin_type=True), FLAG_MSGPACK
+
+
+# Encoders for the types memcached stores natively, matching the flags and
+# encoding of pymemcache's serializer
+_NATIVE_ENCODERS: dict[type, Callable[[Any], Encoded]] = {
+    bytes: lambda value: (value, FLAG_BYTES),
+    str: lambda value: (value.encode('utf8'), FLAG_TEXT),
+    int: lambda value: (b'%d' % value, FLAG_INTEGER),
+}
+
+
+class TypedSerde:
+    """Serde specialized for the value types a service actually stores.
+
+    The encoder for each declared type is picked once, so serializing a
+    declared type is a single dict lookup instead of a chain of type
+    checks. ``bytes``, ``str`` and ``int`` are stored natively, any other
+    declared type goes straight to ``structured``. Values of undeclared
+    types fall back to the wrapped serde, which also does all reads.
+    """
+
+    def __init__(self, serde: Any, value_types: Iterable[type],
+                 structured: Callable[[Any], Encoded] = _pickle_encode) -> None:
+        self._serde = serde
+        self._encoders = {
+            value_type: _NATIVE_ENCODERS.get(value_type, structured)
+            for value_type in value_types
+        }
+
+    def serialize(self, key: Key, value: Any) -> Encoded:
+        encoder = self._encoders.get(type(value))
+        if encoder is None:
+            return self._serde.serialize(key, value)
+        return encoder(value)
+
+    def deserialize(self, key: Key, value: bytes, flags: int) -> Any:
+        return self._serde.deserialize(key, value, flags)
+
+
+def _get_codec(
+    name: str,
+) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes], int]:
+    """Return ``(compress, decompress, flag)`` for a compressor name."""
+    if name == 'zlib':
+        return zlib.compress, zlib.decompress, FLAG_COMPRESSED
+    if name == 'lz4':
+        if lz4 is None:
+            raise ImportError("The lz4 compressor requires the 'lz4' package")
+        return (
+            lambda data: lz4.frame.compress(data, compression_level=0),
+            lz4.frame.decompress,
+            FLAG_LZ4,
+        )
+    if name == 'zstd':
+        if zstandard is None:
+            raise ImportError(
+                "The zstd compressor requires the 'zstandard' package")
+        return (
+            zstandard.ZstdCompressor().compress,
+            zstandard.ZstdDecompressor().decompress,
+            FLAG_ZSTD,
+        )
+    raise ValueError("Unknown compressor %r" % (name,))
+
+
+class CompressionSerde:
+    """Compress serialized values above a size threshold.
+
+    Works like pymemcache's ``CompressedSerde``, but tags values with a
+    per-codec flag so lz4/zstd data is never handed to a zlib reader.
+    zlib-compressed values are always readable, which allows switching a
+    running cluster from zlib to a faster codec.
+    """
+
+    def __init__(self, serde: Any = pickle_serde, compressor: str = 'zlib',
+                 min_compress_len: int = 128) -> None:
+        self._serde = serde
+        self._compress, self._decompress, self._flag = _get_codec(compressor)
+        self._min_compress_len = min_compress_len
+
+    def serialize(self, key: Key, value: Any) -> Encoded:
+        value, flags = self._serde.serialize(key, value)
+
+        if len(value) > self._min_compress_len > 0:
+            compressed = self._compress(value)
+            # Keep the original if compression didn't pay off
+            if len(compressed) < len(value):
+                value = compressed
+                flags |= self._flag
+
+        return value, flags
+
+    def deserialize(self, key: Key, value: bytes, flags: int) -> Any:
+        if flags & self._flag:
+            value = self._decompress(value)
+        elif flags & FLAG_COMPRESSED:
+            value = zlib.decompress(value)
+
+        return self._serde.deserialize(key, value, flags)
+
+
+class _QuickAckSocket:
+    """Socket proxy that re-arms ``TCP_QUICKACK`` before every ``recv``.
+
+    Linux drops out of quick-ack mode on its own, after which the ACK for
+    a reply can be delayed up to 40ms while the next request waits on it.
+    """
+
+    def __init__(self, sock: Any) -> None:
+        self._sock = sock
+
+    def recv(self, *args: Any) -> bytes:
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        return self._sock.recv(*args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._sock, name)
+
+
+class QuickAckClient(Client):
+    """Client that keeps ``TCP_QUICKACK`` enabled on its TCP connection.
+
+    This targets the hot path of small keys and values, where a delayed
+    ACK costs more than the request itself. A no-op outside Linux and for
+    unix socket servers.
+    """
+
+    def _connect(self) -> None:
+        super()._connect()
+        if hasattr(socket, 'TCP_QUICKACK') and isinstance(self.server, tuple):
+            self.sock = _QuickAckSocket(self.sock)  # type: ignore
 
 
 class NamekoHashClient(HashClient):
@@ -13,22 +337,279 @@ class NamekoHashClient(HashClient):
     management and consistent behavior for production use.
     """
 
-    def disconnect_all(self):
+    client_class = QuickAckClient
+
+    def disconnect_all(self) -> None:
         """Disconnect all client connections for proper cleanup."""
         for client in self.clients.values():
             client.close()
 
-    def get_many(self, keys, gets=False, *args, **kwargs):
+    def _batch_keys(self, keys: Iterable[Key]) -> dict[Server, list[Key]]:
+        """Group ``keys`` by node, dropping keys with no live node."""
+        client_batches: dict[Server, list[Key]] = collections.defaultdict(list)
+        for key in keys:
+            client = self._get_client(key)
+            if client is not None:
+                client_batches[client.server].append(key)
+        return client_batches
+
+    def _scatter(self, func: Callable[[Any, Any], Any],
+                 client_batches: dict[Server, Any]) -> list[Any]:
+        """Run ``func(client, batch)`` for every node's batch.
+
+        HashClient visits the nodes one after another, so a multi-node batch
+        costs the sum of their round trips. Each node gets its own green
+        thread instead, so the requests overlap and the batch costs about
+        the slowest round trip. A single node is called directly.
+        """
+        calls = [(self.clients[self._make_client_key(server)], batch)
+                 for server, batch in client_batches.items()]
+        if len(calls) < 2:
+            return [func(client, batch) for client, batch in calls]
+        return list(GreenPool(len(calls)).starmap(func, calls))
+
+    def get_many(self, keys: Iterable[Key], gets: bool = False, *args: Any,
+                 **kwargs: Any) -> dict[Key, Any]:
         """Get multiple keys with consistent behavior.
         
         Filters out False values that pymemcache's HashClient may return,
         ensuring consistent None behavior for missing keys.
         """
-        result = super().get_many(keys, gets, *args, **kwargs)
-        return {key: result.get(key) for key in result if result.get(key)}
+        client_batches = self._batch_keys(keys)
+
+        def get(client: Any, server_keys: list[Key]) -> dict[Key, Any]:
+            get_func = client.gets_many if gets else client.get_many
+            return self._safely_run_func(
+                client, get_func, {}, server_keys, *args, **kwargs)
+
+        result: dict[Key, Any] = {}
+        for values in self._scatter(get, client_batches):
+            result.update(values)
+        return {key: value for key, value in result.items() if value}
 
     get_multi = get_many  # Alias for backward compatibility
 
+    def set_many(self, values: dict[Key, Any], *args: Any,
+                 **kwargs: Any) -> list[Key]:
+        """Set multiple keys, writing to every node concurrently."""
+        client_batches: dict[Server, dict[Key, Any]] = collections.defaultdict(dict)
+        failed = []
+        for key, value in values.items():
+            client = self._get_client(key)
+            if client is None:
+                failed.append(key)
+            else:
+                client_batches[client.server][key] = value
+
+        def set_(client: Any, server_values: dict[Key, Any]) -> list[Key]:
+            return list(self._safely_run_set_many(
+                client, server_values, *args, **kwargs))
+
+        for server_failed in self._scatter(set_, client_batches):
+            failed += server_failed
+        return failed
+
+    set_multi = set_many
+
+    def delete_many(self, keys: Iterable[Key], *args: Any, **kwargs: Any) -> bool:
+        """Delete multiple keys with one pipelined command per node.
+
+        HashClient issues a separate round trip per key; group the keys by
+        node like ``set_many`` does instead.
+        """
+        client_batches = self._batch_keys(keys)
+
+        def delete(client: Any, server_keys: list[Key]) -> Any:
+            return self._safely_run_func(
+                client, client.delete_many, False, server_keys, *args, **kwargs)
+
+        self._scatter(delete, client_batches)
+        return True
+
+    delete_multi = delete_many
+
+
+def _invalidating(name: str) -> Callable[..., Any]:
+    """Build a ``TieredClient`` method that evicts ``key`` before writing."""
+    def method(self: TieredClient, key: Key, *args: Any, **kwargs: Any) -> Any:
+        self._evict(key)
+        return getattr(self._client, name)(key, *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+def _invalidating_many(name: str) -> Callable[..., Any]:
+    """Build a ``TieredClient`` method that evicts several keys before writing."""
+    def method(self: TieredClient, keys: Iterable[Key], *args: Any,
+               **kwargs: Any) -> Any:
+        # Materialise first, so a generator still reaches the backend
+        keys = list(keys)
+        for key in keys:
+            self._evict(key)
+        return getattr(self._client, name)(keys, *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+class TieredClient:
+    """In-process LRU cache (L1) in front of a memcached client.
+
+    Hot keys are served from process memory without a network round trip.
+    L1 holds the Python objects themselves, so hits skip deserialization,
+    and values written with ``set``/``set_many`` are cached as passed in.
+    Callers must therefore treat cached values as immutable, or pass
+    ``copy=True`` to deep-copy values into L1 and again on every hit.
+    Because a hit skips the serializer, it returns the type that was set,
+    while a miss returns what the serializer reads back (e.g. a tuple set
+    under msgpack is a list once it has been through memcached).
+
+    Writes are only cached once memcached has acknowledged them, i.e. when
+    they are sent with ``noreply=False`` (or the client defaults to it).
+    Other writes just evict the key. Entries expire after ``ttl`` seconds,
+    or after a shorter per-call ``expire``, checked against a monotonic
+    timestamp stored with the value, so no timer is needed. Writes through
+    this client update or evict the key in L1, but writes made by other
+    processes are only seen once the entry expires. Use one key type
+    (``str`` or ``bytes``) per key, as they are cached separately. Any
+    other method is passed through to the wrapped client.
+    """
+
+    def __init__(self, client: Any, maxsize: int = 1024, ttl: float = 1.0,
+                 copy: bool = False) -> None:
+        self._client = client
+        self._l1: collections.OrderedDict[Key, tuple[float, Any]] = collections.OrderedDict()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._copy = copy
+        # Bumped on every eviction, so a get that raced a write doesn't
+        # cache the value it read before the write
+        self._generation = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def _lookup(self, key: Key) -> Optional[tuple[float, Any]]:
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._l1.pop(key, None)
+            return None
+        self._l1.move_to_end(key)
+        return entry
+
+    def _store(self, key: Key, value: Any, generation: int,
+               ttl: Optional[float] = None) -> None:
+        if generation != self._generation:
+            return
+        self._l1[key] = (time.monotonic() + (self._ttl if ttl is None else ttl),
+                         value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self._maxsize:
+            self._l1.popitem(last=False)
+
+    def _evict(self, key: Key) -> None:
+        self._generation += 1
+        self._l1.pop(key, None)
+
+    def _isolated(self, value: Any) -> Any:
+        """Copy ``value`` on its way into or out of L1 if ``copy`` is set."""
+        return copy.deepcopy(value) if self._copy else value
+
+    def _write_ttl(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Optional[float]:
+        """L1 lifetime for a ``set``/``set_many`` call, or None to skip L1.
+
+        Arguments follow pymemcache's ``(expire=0, noreply=None, ...)``.
+        """
+        noreply = kwargs.get('noreply', args[1] if len(args) > 1 else None)
+        if noreply is None:
+            noreply = getattr(self._client, 'default_kwargs', {}).get(
+                'default_noreply', getattr(self._client, 'default_noreply', True))
+        if noreply is not False:
+            return None
+        expire = kwargs.get('expire', args[0] if args else 0)
+        return min(expire, self._ttl) if expire else self._ttl
+
+    def get(self, key: Key, default: Any = None, **kwargs: Any) -> Any:
+        entry = self._lookup(key)
+        if entry is not None:
+            return self._isolated(entry[1])
+
+        generation = self._generation
+        value = self._client.get(key, **kwargs)
+        if value is None:
+            return default
+        self._store(key, self._isolated(value), generation)
+        return value
+
+    def get_many(self, keys: Iterable[Key], gets: bool = False, *args: Any,
+                 **kwargs: Any) -> dict[Key, Any]:
+        if gets:
+            # (value, cas) pairs must come from memcached and not be cached
+            return self._client.get_many(keys, True, *args, **kwargs)
+
+        result = {}
+        missing = []
+        for key in keys:
+            entry = self._lookup(key)
+            if entry is None:
+                missing.append(key)
+            elif entry[1]:
+                # NamekoHashClient.get_many drops falsy values, match it
+                result[key] = self._isolated(entry[1])
+
+        if missing:
+            generation = self._generation
+            fetched = self._client.get_many(missing, *args, **kwargs)
+            for key, value in fetched.items():
+                self._store(key, self._isolated(value), generation)
+            result.update(fetched)
+        return result
+
+    get_multi = get_many
+
+    def set(self, key: Key, value: Any, *args: Any, **kwargs: Any) -> bool:
+        self._evict(key)
+        generation = self._generation
+        stored = self._client.set(key, value, *args, **kwargs)
+        ttl = self._write_ttl(args, kwargs)
+        if stored and ttl is not None:
+            self._store(key, self._isolated(value), generation, ttl)
+        return stored
+
+    def set_many(self, values: dict[Key, Any], *args: Any, **kwargs: Any) -> list[Key]:
+        for key in values:
+            self._evict(key)
+        generation = self._generation
+        failed = self._client.set_many(values, *args, **kwargs)
+        ttl = self._write_ttl(args, kwargs)
+        if ttl is not None:
+            for key, value in values.items():
+                if key not in failed:
+                    self._store(key, self._isolated(value), generation, ttl)
+        return failed
+
+    set_multi = set_many
+
+    add = _invalidating('add')
+    replace = _invalidating('replace')
+    append = _invalidating('append')
+    prepend = _invalidating('prepend')
+    cas = _invalidating('cas')
+    delete = _invalidating('delete')
+    incr = _invalidating('incr')
+    decr = _invalidating('decr')
+
+    delete_many = _invalidating_many('delete_many')
+    delete_multi = _invalidating_many('delete_multi')
+
+    def flush_all(self, *args: Any, **kwargs: Any) -> Any:
+        self._generation += 1
+        self._l1.clear()
+        return self._client.flush_all(*args, **kwargs)
+
+
 # Version is handled automatically by setuptools_scm
 try:
     from importlib.metadata import version
@@ -42,54 +623,168 @@ except ImportError:
         __version__ = "0.0.0.dev0"
 
 
+# NamekoHashClient options, overridable via options
+_DEFAULT_CLIENT_OPTIONS = MappingProxyType({
+    # Places keys differently from pymemcache's RendezvousHash, which older
+    # releases used; pass hasher=RendezvousHash to keep that placement
+    'hasher': JumpHasher,
+    # Each concurrent worker checks out its own connection per node
+    'use_pooling': True,
+    # Pooled connections are handed out FIFO, so a get may not run on the
+    # socket a fire-and-forget set went out on. Waiting for the reply keeps
+    # read-your-writes, even within a single worker
+    'default_noreply': False,
+    'no_delay': True,
+})
+
+# libmemcached behaviors for the pylibmc backend, overridable via options
+_PYLIBMC_BEHAVIORS = MappingProxyType({
+    'ketama': True,
+    'tcp_nodelay': True,
+    'no_block': True,
+    'connect_timeout': 50,
+})
+
+
 class Memcached(DependencyProvider):
-    def __init__(self, **options):
-        self.clients = WeakKeyDictionary()
+    backends = ('pymemcache', 'pylibmc')
+    serializers = ('pickle', 'msgpack')
+    compressors = ('zlib', 'lz4', 'zstd')
+
+    def __init__(self, backend: str = 'pymemcache', serializer: str = 'pickle',
+                 compressor: str = 'zlib', compress_threshold: int = 128,
+                 value_types: Optional[Iterable[type]] = None, l1_size: int = 0,
+                 l1_ttl: float = 1.0, l1_copy: bool = False, **options: Any) -> None:
+        if backend not in self.backends:
+            raise ValueError(
+                "Unknown backend %r, expected one of %s"
+                % (backend, ', '.join(self.backends)))
+        if serializer not in self.serializers:
+            raise ValueError(
+                "Unknown serializer %r, expected one of %s"
+                % (serializer, ', '.join(self.serializers)))
+        if compressor not in self.compressors:
+            raise ValueError(
+                "Unknown compressor %r, expected one of %s"
+                % (compressor, ', '.join(self.compressors)))
+        if value_types is not None:
+            value_types = tuple(value_types)
+            if not all(isinstance(type_, type) for type_ in value_types):
+                raise TypeError(
+                    "value_types must be types, got %r" % (value_types,))
+        if backend == 'pylibmc':
+            # pylibmc has its own serialization and no L1 wrapper, so these
+            # would otherwise be silently ignored
+            unsupported = [name for name, value, default in (
+                ('serializer', serializer, 'pickle'),
+                ('compressor', compressor, 'zlib'),
+                ('compress_threshold', compress_threshold, 128),
+                ('value_types', value_types, None),
+                ('l1_size', l1_size, 0),
+                ('l1_ttl', l1_ttl, 1.0),
+                ('l1_copy', l1_copy, False),
+            ) if value != default]
+            if pylibmc is not None:
+                # Catch pymemcache options (e.g. use_pooling) up front
+                unsupported += sorted(
+                    set(options) - set(pylibmc.all_behaviors) - {'binary'})
+            if unsupported:
+                raise ValueError(
+                    "The pylibmc backend does not support %s"
+                    % ', '.join(unsupported))
+        elif not options.get('use_pooling', True):
+            # All workers share one client, so each needs its own connection
+            raise ValueError(
+                "use_pooling cannot be disabled, workers share one client")
+        self.client: Any = None
+        self.backend = backend
+        self.serializer = serializer
+        self.compressor = compressor
+        self.compress_threshold = compress_threshold
+        self.value_types = value_types
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self.l1_copy = l1_copy
         self.options = options
 
-    def setup(self):
+    def setup(self) -> None:
         self.uris = self.container.config['MEMCACHED_URIS']
         self.user = self.container.config.get('MEMCACHED_USER', None)
         self.password = self.container.config.get('MEMCACHED_PASSWORD', None)
 
-    def get_dependency(self, worker_ctx):
-        client = self._get_client()
-        self.clients[worker_ctx] = client
-        return client
+        # Parse servers and build client options once, not per worker
+        self._servers = self._split_host_and_port(self.uris)
+        self._client_options = self._build_client_options()
+
+        # One pooled client is shared by all workers, so sockets stay warm
+        # and dead-node state survives between requests
+        self.client = self._get_client()
+        if self.l1_size:
+            self.client = TieredClient(
+                self.client, self.l1_size, self.l1_ttl, self.l1_copy)
+
+    def stop(self) -> None:
+        self._disconnect()
 
-    def worker_teardown(self, worker_ctx):
-        client = self.clients.pop(worker_ctx, None)
-        if client:
-            client.disconnect_all()
+    def kill(self) -> None:
+        self._disconnect()
 
-    def _split_host_and_port(self, servers):
+    def get_dependency(self, worker_ctx: Any) -> Any:
+        return self.client
+
+    def _disconnect(self) -> None:
+        if self.client:
+            self.client.disconnect_all()
+
+    def _split_host_and_port(self, servers: Iterable[str]) -> list[Server]:
         """Convert python-memcached based server strings to pymemcache format.
-        
-        - Input: ['127.0.0.1:11211', ...] or ['127.0.0.1', ...]
-        - Output: [('127.0.0.1', 11211), ...]
+
+        - Input: ['127.0.0.1:11211', '[::1]:11211', ...] or ['127.0.0.1', '::1', ...]
+        - Output: [('127.0.0.1', 11211), ('::1', 11211), ...]
         """
         host_and_port_list = []
         for server in servers:
-            connection_info = server.split(':')
-            if len(connection_info) == 1:
-                host_and_port_list.append((connection_info[0], 11211))
-            elif len(connection_info) == 2:
-                host_and_port_list.append((connection_info[0], int(connection_info[1])))
+            if server.startswith('['):
+                # Bracketed IPv6, with or without a port: [::1]:11211
+                host, _, port = server[1:].partition(']')
+                port = port[1:]
+            elif server.count(':') > 1:
+                # Bare IPv6 address, no port
+                host, port = server, ''
+            else:
+                host, _, port = server.partition(':')
+            host_and_port_list.append(
+                (sys.intern(host), int(port) if port else 11211))
         return host_and_port_list
 
-    def _get_client(self):
-        # Parse servers to (host, port) tuples
-        servers = self._split_host_and_port(self.uris)
+    def _build_client_options(self) -> dict[str, Any]:
+        if self.backend == 'pylibmc':
+            return self._build_pylibmc_options()
 
-        # Set up bmemcached-compatible compression (128-byte threshold like bmemcached)
-        bmemcached_compatible_serde = CompressedSerde(min_compress_len=128)
-        
-        client_options = {
-            'serde': bmemcached_compatible_serde,
-        }
+        serde: Any
+        if self.serializer == 'msgpack':
+            serde = MsgpackSerde()
+            structured = _msgpack_encode
+        else:
+            serde = pickle_serde
+            structured = _pickle_encode
+
+        if self.value_types:
+            serde = TypedSerde(serde, self.value_types, structured)
+
+        # Defaults to bmemcached-compatible zlib compression (128-byte threshold like bmemcached)
+        compressed_serde = CompressionSerde(
+            serde=serde,
+            compressor=self.compressor,
+            min_compress_len=self.compress_threshold,
+        )
 
         # Merge in user-provided options (they can override defaults)
-        client_options.update(self.options)
+        client_options = {
+            **_DEFAULT_CLIENT_OPTIONS,
+            'serde': compressed_serde,
+            **self.options,
+        }
 
         # Handle authentication if provided
         if self.user and self.password:
@@ -98,8 +793,38 @@ class Memcached(DependencyProvider):
             # or connection string
             pass  # For now, auth is handled differently in pymemcache
 
-        return NamekoHashClient(servers, **client_options)
+        return client_options
+
+    def _build_pylibmc_options(self) -> dict[str, Any]:
+        behaviors = {**_PYLIBMC_BEHAVIORS, **self.options}
+        # The binary protocol is deprecated in memcached, default to text
+        binary = behaviors.pop('binary', False)
+        return {'binary': binary, 'behaviors': behaviors}
+
+    def _get_client(self) -> Any:
+        if self.backend == 'pylibmc':
+            return self._get_pylibmc_client()
+        return NamekoHashClient(self._servers, **self._client_options)
+
+    def _get_pylibmc_client(self) -> Any:
+        if pylibmc is None:
+            raise ImportError("The pylibmc backend requires the 'pylibmc' package")
+        servers = [
+            ('[%s]:%d' if ':' in host else '%s:%d') % (host, port)
+            for host, port in self._servers
+        ]
+        return pylibmc.Client(servers, **self._client_options)
 
 
 # Export the client class for direct use
-__all__ = ['Memcached', 'NamekoHashClient']
+__all__ = [
+    'Memcached',
+    'NamekoHashClient',
+    'QuickAckClient',
+    'TieredClient',
+    'JumpHasher',
+    'RendezvousHasher',
+    'MsgpackSerde',
+    'TypedSerde',
+    'CompressionSerde',
+]
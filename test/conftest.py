@@ -0,0 +1,40 @@
+import eventlet
+eventlet.monkey_patch()  # noqa (before test modules import nameko)
+
+import socket
+
+import pytest
+
+from pymemcache.client.base import Client
+from pymemcache.serde import (
+    python_memcache_serializer,
+    python_memcache_deserializer
+)
+
+
+MEMCACHED_ADDRESS = ('127.0.0.1', 11211)
+
+
+@pytest.fixture(scope="session")
+def memcached_available():
+    """Probe the local memcached once and skip dependent tests without it."""
+    sock = socket.socket()
+    sock.settimeout(0.2)
+    try:
+        sock.connect(MEMCACHED_ADDRESS)
+    except OSError:
+        pytest.skip("no memcached listening on %s:%d" % MEMCACHED_ADDRESS)
+    finally:
+        sock.close()
+
+
+@pytest.fixture(scope="session")
+def shared_client(memcached_available):
+    """One raw pymemcache client, connected once for the whole session."""
+    client = Client(
+        MEMCACHED_ADDRESS,
+        serializer=python_memcache_serializer,
+        deserializer=python_memcache_deserializer
+    )
+    yield client
+    client.quit()
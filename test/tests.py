@@ -1,21 +1,53 @@
-import eventlet
-eventlet.monkey_patch()  # noqa (code before rest of imports)
+import collections
+import socket
+import uuid
+from types import SimpleNamespace
+from unittest.mock import Mock, call, patch
 
-from nameko.containers import ServiceContainer  # noqa
-from nameko.testing.services import entrypoint_hook, dummy  # noqa
+from eventlet import GreenPool
 
-import pytest  # noqa
+from nameko.containers import ServiceContainer
+from nameko.testing.services import entrypoint_hook, dummy
 
-from pymemcache.client.base import Client  # noqa
-from pymemcache.serde import (  # noqa
+import pytest
+
+from pymemcache.client.rendezvous import RendezvousHash
+from pymemcache.serde import (
+    pickle_serde,
     python_memcache_serializer,
     python_memcache_deserializer
 )
 
-from nameko_pymemcache import Memcached  # noqa
+import nameko_pymemcache
+from nameko_pymemcache import (
+    CompressionSerde,
+    JumpHasher,
+    Memcached,
+    MsgpackSerde,
+    NamekoHashClient,
+    QuickAckClient,
+    RendezvousHasher,
+    TieredClient,
+    TypedSerde,
+)
+
 
+MEMCACHED_URI = '127.0.0.1:11211'
+# Keys are namespaced per test process so concurrent runs against one
+# memcached (e.g. pytest-xdist workers) don't clobber each other
+KEY_PREFIX = uuid.uuid4().hex
+TEST_KEY = KEY_PREFIX + '-nameko-test-value'
+
+# python-memcache compatible serde shared by the raw clients below
+SERDE = dict(
+    serializer=python_memcache_serializer,
+    deserializer=python_memcache_deserializer,
+)
 
-TEST_KEY = 'nameko-test-value'
+# Values on either side of the default 128 byte compression threshold,
+# built once and shared by the parametrized compression tests
+SMALL_VALUE = 'x' * 100
+LARGE_VALUE = {'values': ['value_%d' % i for i in range(200)]}
 
 
 class ExampleService(object):
@@ -24,114 +56,561 @@ class ExampleService(object):
 
     @dummy
     def write(self, value):
-        self.memcached.set(TEST_KEY, value)
+        # Wait for the ack, so reads on other connections see the write
+        self.memcached.set(TEST_KEY, value, noreply=False)
 
     @dummy
     def read(self):
         return self.memcached.get(TEST_KEY)
 
 
+@pytest.fixture(scope="module")
+def module_container(memcached_available):
+    """One running ExampleService container shared by the module's tests."""
+    container = ServiceContainer(ExampleService, {'MEMCACHED_URIS': [MEMCACHED_URI]})
+    container.start()
+    yield container
+    container.stop()
+
+
 @pytest.fixture
-def memcached():
-    uri = '127.0.0.1:11211'
+def container(module_container):
+    yield module_container
+
+    # Reset the only key ExampleService writes instead of restarting
+    dependency = next(
+        ext for ext in module_container.extensions if isinstance(ext, Memcached))
+    dependency.client.delete(TEST_KEY, noreply=False)
+
+
+@pytest.fixture
+def memcached(shared_client):
+    uri = MEMCACHED_URI
 
     yield uri
 
-    # Cleanup with both client types to be safe
-    client = Client(
-        ('127.0.0.1', 11211),
-        serializer=python_memcache_serializer,
-        deserializer=python_memcache_deserializer
-    )
-    client.delete(TEST_KEY)
-    client.quit()
-
-    # Also cleanup with our Nameko hash client
-    from nameko_pymemcache import NamekoHashClient
-    hash_client = NamekoHashClient(
-        [('127.0.0.1', 11211)],
-        serializer=python_memcache_serializer,
-        deserializer=python_memcache_deserializer
-    )
-    hash_client.delete(TEST_KEY)
+    shared_client.delete(TEST_KEY, noreply=False)
+
+
+@pytest.fixture(scope="module")
+def hash_client(memcached_available):
+    """One NamekoHashClient, and its pooled connections, for the module."""
+    hash_client = NamekoHashClient([('127.0.0.1', 11211)], **SERDE)
+    yield hash_client
     hash_client.disconnect_all()
 
 
-def test_memcached_connection():
+@pytest.fixture
+def make_memcached(memcached):
+    """Build a set-up Memcached dependency outside of a container."""
+    dependencies = []
+
+    def make(**options):
+        dependency = Memcached(**options)
+        dependency.container = SimpleNamespace(
+            config={'MEMCACHED_URIS': [memcached]})
+        dependency.setup()
+        dependencies.append(dependency)
+        return dependency
+
+    yield make
+
+    for dependency in dependencies:
+        dependency.stop()
+
+
+def test_memcached_connection(shared_client):
     """Test that memcached is accessible and working."""
-    client = Client(
-        ('127.0.0.1', 11211),
-        serializer=python_memcache_serializer,
-        deserializer=python_memcache_deserializer
-    )
-    
+    client = shared_client
+
     # Test basic connectivity
-    test_key = 'connectivity_test'
-    test_value = 'test_value'
+    test_key = KEY_PREFIX + '_connectivity_test'
+    test_value = b'test_value'
     
     client.set(test_key, test_value)
     result = client.get(test_key)
     client.delete(test_key)
-    client.quit()
-    
+
     assert result == test_value, f"Basic memcached test failed: got {result}, expected {test_value}"
 
 
-def test_hash_client_direct():
+def test_hash_client_direct(hash_client):
     """Test that our NamekoHashClient works directly."""
-    from nameko_pymemcache import NamekoHashClient
-    hash_client = NamekoHashClient(
-        [('127.0.0.1', 11211)],
-        serializer=python_memcache_serializer,
-        deserializer=python_memcache_deserializer
-    )
-    
-    test_key = 'hash_test'
+    test_key = KEY_PREFIX + '_hash_test'
     test_value = 'hash_value'
     
     hash_client.set(test_key, test_value)
     result = hash_client.get(test_key)
     hash_client.delete(test_key)
-    hash_client.disconnect_all()
-    
+
     assert result == test_value, f"HashClient test failed: got {result}, expected {test_value}"
 
 
-def test_end_to_end(memcached):
-    config = {
-        'MEMCACHED_URIS': [memcached, ]
-    }
+def test_quickack_client(memcached_available):
+    client = QuickAckClient(('127.0.0.1', 11211), no_delay=True)
 
-    container = ServiceContainer(ExampleService, config)
-    container.start()
+    key = KEY_PREFIX + '_quickack_test'
 
     try:
-        # write through the service
-        with entrypoint_hook(container, "write") as write:
-            result = write("foobar")
-            print(f"Write result: {result}")
-
-        # verify changes written to memcached directly
-        client = Client(
-            ('127.0.0.1', 11211),
-            serializer=python_memcache_serializer,
-            deserializer=python_memcache_deserializer
-        )
-        
-        # Debug: check if key exists
-        value = client.get(TEST_KEY)
-        print(f"Direct memcached get result: {value}")
-        print(f"Expected: 'foobar'")
-        
-        # Test reading through the service first (should work if write worked)
-        with entrypoint_hook(container, "read") as read:
-            service_value = read()
-            print(f"Service read result: {service_value}")
-
-        # Both should return the same value
-        assert service_value == "foobar", f"Service read failed: got {service_value}, expected 'foobar'"
-        assert value == "foobar", f"Direct memcached read failed: got {value}, expected 'foobar'"
-        
-        client.quit()
+        client.set(key, b'value')
+        assert client.sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        if not hasattr(socket, 'TCP_QUICKACK'):
+            pytest.skip('TCP_QUICKACK is Linux only')
+
+        # Quick-ack mode is re-armed before every read of a reply
+        inner = Mock(wraps=client.sock._sock)
+        client.sock._sock = inner
+        for _ in range(3):
+            inner.reset_mock()
+            assert client.get(key) == b'value'
+            calls = inner.mock_calls
+            recvs = [i for i, (name, _, _) in enumerate(calls) if name == 'recv']
+            assert recvs
+            for i in recvs:
+                assert calls[i - 1] == call.setsockopt(
+                    socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        client.delete(key)
     finally:
+        client.close()
+
+
+def test_hash_client_batch_operations(hash_client):
+    """set_many/get_many/delete_many batch keys per node."""
+    values = {'%s_batch_test_%d' % (KEY_PREFIX, i): 'value_%d' % i for i in range(10)}
+
+    hash_client.set_many(values, noreply=False)
+    assert hash_client.get_many(list(values)) == values
+
+    node_client = hash_client.clients['127.0.0.1:11211']
+    with patch.object(node_client, 'delete_many',
+                      wraps=node_client.delete_many) as delete_many:
+        hash_client.delete_many(list(values), noreply=False)
+    delete_many.assert_called_once()
+    assert hash_client.get_many(list(values)) == {}
+
+
+def test_hash_client_scatters_across_nodes():
+    """Batches for several nodes run concurrently, one call per node."""
+    hash_client = NamekoHashClient(
+        [('cache-a', 11211), ('cache-b', 11211)], **SERDE)
+    for node_key, client in list(hash_client.clients.items()):
+        node = Mock(server=client.server)
+        node.get_many.side_effect = lambda keys: {key: key for key in keys}
+        node.set_many.return_value = []
+        hash_client.clients[node_key] = node
+
+    keys = ['scatter_%d' % i for i in range(20)]
+    with patch('nameko_pymemcache.GreenPool', wraps=GreenPool) as pool:
+        assert hash_client.set_many({key: key for key in keys}) == []
+        assert hash_client.get_many(keys) == {key: key for key in keys}
+        assert hash_client.delete_many(keys) is True
+    assert pool.call_count == 3
+
+    for node in hash_client.clients.values():
+        node.set_many.assert_called_once()
+        node.get_many.assert_called_once()
+        node.delete_many.assert_called_once()
+
+
+def test_end_to_end(container, shared_client):
+    # write through the service
+    with entrypoint_hook(container, "write") as write:
+        result = write("foobar")
+        print(f"Write result: {result}")
+
+    # verify changes written to memcached directly
+    # Debug: check if key exists
+    value = shared_client.get(TEST_KEY)
+    print(f"Direct memcached get result: {value}")
+    print(f"Expected: 'foobar'")
+
+    # Test reading through the service first (should work if write worked)
+    with entrypoint_hook(container, "read") as read:
+        service_value = read()
+        print(f"Service read result: {service_value}")
+
+    # Both should return the same value
+    assert service_value == "foobar", f"Service read failed: got {service_value}, expected 'foobar'"
+    assert value == "foobar", f"Direct memcached read failed: got {value}, expected 'foobar'"
+
+
+def test_read_missing_key(container):
+    """Runs after test_end_to_end on the same container, with the key reset."""
+    with entrypoint_hook(container, "read") as read:
+        assert read() is None
+
+
+def test_client_shared_across_workers(memcached):
+    """Workers share one client, which is only disconnected on stop."""
+    container = ServiceContainer(ExampleService, {'MEMCACHED_URIS': [memcached]})
+    container.start()
+
+    dependency = next(
+        ext for ext in container.extensions if isinstance(ext, Memcached))
+    client = dependency.get_dependency(Mock())
+    assert dependency.get_dependency(Mock()) is client
+
+    with patch.object(client, 'disconnect_all') as disconnect_all:
         container.stop()
+    disconnect_all.assert_called_once_with()
+
+
+@pytest.mark.parametrize('serializer', ['pickle', 'msgpack'])
+def test_counters_bypass_serializer(make_memcached, serializer):
+    """Integers are stored as plain digits, so memcached can incr them."""
+    if serializer == 'msgpack':
+        pytest.importorskip('msgpack')
+    client = make_memcached(serializer=serializer).get_dependency(Mock())
+
+    client.set(TEST_KEY, 10)
+    assert client.incr(TEST_KEY, 1) == 11
+    assert client.get(TEST_KEY) == 11
+
+    client.set(TEST_KEY, b'raw')
+    assert client.get(TEST_KEY) == b'raw'
+
+
+def test_pooled_client_reads_its_writes(make_memcached):
+    """Writes are acknowledged by default, so any pooled socket sees them."""
+    client = make_memcached().get_dependency(Mock())
+    assert client.default_kwargs['default_noreply'] is False
+
+    for i in range(20):
+        client.set(TEST_KEY, i)
+        assert client.get(TEST_KEY) == i
+
+
+def test_concurrent_workers_share_pooled_client(make_memcached):
+    """Concurrent workers each check out their own pooled connection."""
+    client = make_memcached().get_dependency(Mock())
+
+    def worker(i):
+        key = '%s_worker_%d' % (KEY_PREFIX, i)
+        for n in range(5):
+            client.set(key, n)
+            assert client.get(key) == n
+        client.delete(key)
+
+    pool = GreenPool(50)
+    for _ in pool.imap(worker, range(50)):
+        pass
+
+
+def test_pooling_cannot_be_disabled():
+    with pytest.raises(ValueError, match='use_pooling'):
+        Memcached(use_pooling=False)
+
+
+def test_legacy_hasher_option(make_memcached):
+    """pymemcache's RendezvousHash can still be chosen to keep old placement."""
+    assert isinstance(make_memcached().client.hasher, JumpHasher)
+    client = make_memcached(hasher=RendezvousHash).client
+    assert isinstance(client.hasher, RendezvousHash)
+
+
+def test_rendezvous_hasher_distribution():
+    """Keys spread evenly and removing a node only moves its own keys."""
+    hasher = RendezvousHasher()
+    for node in ('a:11211', 'b:11211', 'c:11211'):
+        hasher.add_node(node)
+
+    keys = ['key_%d' % i for i in range(3000)]
+    before = {key: hasher.get_node(key) for key in keys}
+    counts = collections.Counter(before.values())
+    assert max(counts.values()) / min(counts.values()) < 1.2
+
+    hasher.remove_node('b:11211')
+    for key in keys:
+        if before[key] != 'b:11211':
+            assert hasher.get_node(key) == before[key]
+
+
+@pytest.fixture
+def backend():
+    """Stand-in for the wrapped client, with pymemcache's noreply default."""
+    backend = Mock(default_kwargs={'default_noreply': True})
+    backend.get.return_value = 'value'
+    backend.set.return_value = True
+    backend.set_many.return_value = []
+    return backend
+
+
+@pytest.fixture
+def client(backend):
+    return TieredClient(backend, ttl=60)
+
+
+def test_tiered_client_caches_hot_keys(backend):
+    client = TieredClient(backend, maxsize=2, ttl=60)
+
+    assert client.get('a') == 'value'
+    assert client.get('a') == 'value'
+    assert backend.get.call_count == 1
+
+    # Writes through the client evict the key
+    client.delete('a')
+    backend.delete.assert_called_once_with('a')
+    client.get('a')
+    assert backend.get.call_count == 2
+
+    # Least recently used key is dropped once maxsize is exceeded
+    client.get('b')
+    client.get('c')
+    client.get('a')
+    assert backend.get.call_count == 5
+
+    # Misses aren't cached and return the default
+    backend.get.return_value = None
+    assert client.get('d', default='fallback') == 'fallback'
+    assert client.get('d') is None
+
+
+def test_tiered_client_write_through(backend, client):
+    """Acknowledged writes are served from L1 as-is."""
+
+    value = {'a': 1}
+    client.set('a', value, noreply=False)
+    assert client.get('a') is value
+    client.set_many({'b': 2}, noreply=False)
+    assert client.get_many(['a', 'b']) == {'a': value, 'b': 2}
+    backend.get.assert_not_called()
+    backend.get_many.assert_not_called()
+
+    # Failed writes aren't cached
+    backend.set.return_value = False
+    client.set('c', 3, noreply=False)
+    backend.get.return_value = None
+    assert client.get('c') is None
+
+
+def test_tiered_client_get_many_drops_falsy_hits(backend, client):
+    """L1 hits are filtered like NamekoHashClient.get_many results."""
+
+    client.set('a', 0, noreply=False)
+    client.set('b', 'value', noreply=False)
+    assert client.get_many(['a', 'b']) == {'b': 'value'}
+    assert client.get('a') == 0
+    backend.get_many.assert_not_called()
+
+
+def test_tiered_client_copy_isolates_l1(backend):
+    """With copy=True, mutating a set or returned value doesn't reach L1."""
+    client = TieredClient(backend, ttl=60, copy=True)
+
+    value = {'a': [1]}
+    client.set('a', value, noreply=False)
+    value['a'].append(2)
+    assert client.get('a') == {'a': [1]}
+    client.get('a')['a'].append(3)
+    assert client.get('a') == {'a': [1]}
+    backend.get.assert_not_called()
+
+    # Values read from memcached are isolated from L1 too
+    backend.get.return_value = {'b': [1]}
+    client.get('b')['b'].append(99)
+    assert client.get('b') == {'b': [1]}
+    backend.get_many.return_value = {'c': [1]}
+    client.get_many(['c'])['c'].append(99)
+    assert client.get_many(['c']) == {'c': [1]}
+    backend.get.assert_called_once_with('b')
+    backend.get_many.assert_called_once_with(['c'])
+
+
+def test_tiered_client_unacknowledged_writes_evict(backend, client):
+    """noreply writes may never apply, so they only evict the key."""
+    backend.get.return_value = 'stored'
+
+    client.set('a', 'value')
+    client.set_many({'b': 'value'}, 0, True)
+    assert client.get('a') == 'stored'
+    assert client.get('b') == 'stored'
+    assert backend.get.call_count == 2
+
+
+def test_tiered_client_write_expire(monkeypatch, backend, client):
+    """A per-call expire shorter than the L1 ttl bounds the L1 entry."""
+    now = [100.0]
+    monkeypatch.setattr(nameko_pymemcache.time, 'monotonic', lambda: now[0])
+    backend.get.return_value = 'stored'
+
+    client.set('a', 'value', expire=5, noreply=False)
+    client.set('b', 'value', noreply=False)
+    now[0] += 10
+    assert client.get('a') == 'stored'
+    assert client.get('b') == 'value'
+    backend.get.assert_called_once_with('a')
+
+
+def test_tiered_client_delete_many_generator(backend, client):
+    """Keys passed as a generator are evicted and still sent to memcached."""
+    client.get('a')
+
+    client.delete_many(key for key in ['a', 'b'])
+    backend.delete_many.assert_called_once_with(['a', 'b'])
+    client.get('a')
+    assert backend.get.call_count == 2
+
+
+def test_tiered_client_gets_bypasses_l1(backend, client):
+    """get_many(gets=True) returns cas tokens, which never enter L1."""
+    backend.get_many.return_value = {'a': ('value', b'1')}
+
+    assert client.get_many(['a'], gets=True) == {'a': ('value', b'1')}
+    assert client.get('a') == 'value'
+    backend.get.assert_called_once_with('a')
+
+    assert client.get_many(['a'], gets=True) == {'a': ('value', b'1')}
+    assert backend.get_many.call_count == 2
+
+
+def test_tiered_client_ttl(backend):
+    client = TieredClient(backend, ttl=0)
+
+    client.get('a')
+    client.get('a')
+    assert backend.get.call_count == 2
+
+
+def test_split_host_and_port():
+    memcached = Memcached()
+    assert memcached._split_host_and_port([
+        '127.0.0.1:11212',
+        'cache.local',
+        '[::1]:11213',
+        '[fe80::1]',
+        '::1',
+    ]) == [
+        ('127.0.0.1', 11212),
+        ('cache.local', 11211),
+        ('::1', 11213),
+        ('fe80::1', 11211),
+        ('::1', 11211),
+    ]
+
+
+def test_pylibmc_backend(make_memcached):
+    pytest.importorskip('pylibmc')
+    dependency = make_memcached(backend='pylibmc', no_block=False)
+    client = dependency.get_dependency(Mock())
+
+    client.set(TEST_KEY, 'foobar')
+    assert client.get(TEST_KEY) == 'foobar'
+    assert client.get_multi([TEST_KEY]) == {TEST_KEY: 'foobar'}
+
+
+def test_jump_hasher_distribution():
+    """Keys spread over all nodes and adding a node only moves ~1/n of them."""
+    hasher = JumpHasher()
+    for node in ('a:11211', 'b:11211', 'c:11211'):
+        hasher.add_node(node)
+
+    keys = ['key_%d' % i for i in range(3000)]
+    before = {key: hasher.get_node(key) for key in keys}
+    assert set(before.values()) == {'a:11211', 'b:11211', 'c:11211'}
+
+    hasher.add_node('d:11211')
+    moved = [key for key in keys if hasher.get_node(key) != before[key]]
+    assert all(hasher.get_node(key) == 'd:11211' for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+
+def test_jump_hasher_dead_node_fallback():
+    """Keys on a dead node are re-routed, keys on live nodes stay put."""
+    hasher = JumpHasher()
+    for node in ('a:11211', 'b:11211', 'c:11211'):
+        hasher.add_node(node)
+
+    keys = ['key_%d' % i for i in range(300)]
+    before = {key: hasher.get_node(key) for key in keys}
+
+    hasher.remove_node('b:11211')
+    for key in keys:
+        node = hasher.get_node(key)
+        assert node != 'b:11211'
+        if before[key] != 'b:11211':
+            assert node == before[key]
+
+    hasher.add_node('b:11211')
+    assert {key: hasher.get_node(key) for key in keys} == before
+
+
+def test_msgpack_serde_round_trip():
+    pytest.importorskip('msgpack')
+    serde = MsgpackSerde()
+
+    for value in (b'raw', 'text åäö', 42, {'a': [1, 2.5, None]}, {1: 'a'}, True):
+        data, flags = serde.serialize('key', value)
+        assert isinstance(data, bytes)
+        assert serde.deserialize('key', data, flags) == value
+
+    # Counters are stored as plain digits so memcached can incr them
+    assert serde.serialize('key', 10) == (b'10', 2)
+
+
+def test_typed_serde_matches_generic_serde():
+    serde = TypedSerde(pickle_serde, (int, dict))
+
+    for value in (10, {'a': [1, 2]}, 'undeclared', (1, 2)):
+        data, flags = serde.serialize('key', value)
+        expected_data, expected_flags = pickle_serde.serialize('key', value)
+        # pymemcache leaves ints as str for the client to encode
+        if isinstance(expected_data, str):
+            expected_data = expected_data.encode()
+        assert (data, flags) == (expected_data, expected_flags)
+        assert serde.deserialize('key', data, flags) == value
+
+
+@pytest.mark.parametrize('option,value', [
+    ('backend', 'python-memcached'),
+    ('serializer', 'json'),
+    ('compressor', 'brotli'),
+])
+def test_unknown_option_value(option, value):
+    with pytest.raises(ValueError, match=value):
+        Memcached(**{option: value})
+
+
+@pytest.mark.parametrize('option,value', [
+    ('serializer', 'msgpack'),
+    ('compressor', 'zstd'),
+    ('compress_threshold', 1024),
+    ('value_types', (int,)),
+    ('l1_size', 128),
+    ('l1_copy', True),
+])
+def test_pylibmc_backend_rejects_pymemcache_options(option, value):
+    with pytest.raises(ValueError, match=option):
+        Memcached(backend='pylibmc', **{option: value})
+
+
+def test_pylibmc_backend_rejects_unknown_behaviors():
+    pytest.importorskip('pylibmc')
+    with pytest.raises(ValueError, match='use_pooling'):
+        Memcached(backend='pylibmc', use_pooling=True)
+    Memcached(backend='pylibmc', binary=True, no_block=False)
+
+
+def test_value_types_must_be_types():
+    with pytest.raises(TypeError, match='value_types'):
+        Memcached(value_types=('int', 'dict'))
+
+
+@pytest.mark.parametrize('compressor', ['zlib', 'lz4', 'zstd'])
+def test_compression_serde_round_trip(compressor):
+    if compressor != 'zlib':
+        pytest.importorskip({'lz4': 'lz4.frame', 'zstd': 'zstandard'}[compressor])
+    serde = CompressionSerde(compressor=compressor, min_compress_len=128)
+
+    data, flags = serde.serialize('key', SMALL_VALUE)
+    assert data == SMALL_VALUE.encode()
+
+    data, flags = serde.serialize('key', LARGE_VALUE)
+    assert serde.deserialize('key', data, flags) == LARGE_VALUE
+
+
+def test_compression_serde_reads_zlib_values():
+    """Switching the compressor keeps zlib (bmemcached) values readable."""
+    pytest.importorskip('lz4.frame')
+    value = 'x' * 1000
+    data, flags = CompressionSerde(compressor='zlib').serialize('key', value)
+    assert CompressionSerde(compressor='lz4').deserialize('key', data, flags) == value